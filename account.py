@@ -1,8 +1,16 @@
 from transaction import Transaction, Base
-import datetime
-from exceptions import TransactionSequenceError
+from archive import ArchivedTransaction, MonthlyRollup
+from monthly_summary import MonthlySummary
+from interest import CurrentBalancePolicy, last_date_of_month
+from ledger import Ledger
+import idempotency
+from exceptions import TransactionSequenceError, NoTransactionsError
 from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import relationship, object_session
+from sqlalchemy.orm.collections import attribute_mapped_collection
+import datetime
+from itertools import chain, groupby
 import decimal
 decimal.getcontext().rounding = decimal.ROUND_HALF_UP
 
@@ -15,6 +23,11 @@ class Account(Base):
     _bank_id = Column(Integer, ForeignKey("bank._id"))
 
     _transactions = relationship("Transaction", backref="account")
+    _rollups = relationship("MonthlyRollup", backref="account", order_by="MonthlyRollup._month")
+    # archived detail is only queried on demand, never loaded with the account
+    _archived_transactions = relationship("ArchivedTransaction", backref="account", lazy="dynamic")
+    _monthly_summaries = relationship("MonthlySummary", backref="account", cascade="all, delete-orphan",
+                                      collection_class=attribute_mapped_collection("_month"))
     _type = Column(String)
     _account_number = Column(Integer)
     _balance = Column(Float(asdecimal=True))
@@ -24,6 +37,9 @@ class Account(Base):
         'polymorphic_identity':'account', 
         'polymorphic_on': _type
     }
+
+    # how the balance that interest is calculated on is derived, set per account type
+    _interest_policy = CurrentBalancePolicy()
     
     def __init__(self, account_number=None):
         self._balance = decimal.Decimal(0.0)
@@ -32,6 +48,18 @@ class Account(Base):
     def get_transactions(self):
         """Return a list of transactions."""
         return self._transactions
+
+    def get_ledger(self):
+        """Return a read-only ledger of the transactions, loaded without building Transaction objects."""
+        if getattr(self, "_ledger", None) is None:
+            session = object_session(self)
+            if session is None:
+                self._ledger = Ledger()
+            else:
+                # raw SQL bypasses autoflush, so write pending transactions first
+                session.flush()
+                self._ledger = Ledger.load(session, [self._id])[self._id]
+        return self._ledger
     
     def get_balance(self):
         """Return the current balance."""
@@ -41,32 +69,152 @@ class Account(Base):
         """Return the account number."""
         return self._account_number
 
-    def add_transaction(self, amount, date, session):
-        """Add a transaction.
+    def get_interest_base(self):
+        """Return the balance interest is calculated on for the current month."""
+        return self._interest_policy.interest_base(self, self._interest_month_end())
+
+    def _interest_month_end(self):
+        """Return the last date of the month interest is applied for.
+
+        Raises:
+            NoTransactionsError if the account has no transactions
+        """
+        latest_date = self.get_ledger().latest_date()
+        if latest_date is None:
+            raise NoTransactionsError
+        return last_date_of_month(latest_date)
+
+    def add_transaction(self, amount, date, session, kind=None, idempotency_key=None):
+        """Add a transaction and record it in the month's summary.
+
+        Subclasses check already_posted before their own constraints, so a
+        retried posting returns the original result instead of failing them.
         
         Args:
             amount (decimal.Decimal)
             date (datetime.date)
+            kind (str): "interest", "fee" or None for a deposit/withdrawal
+            idempotency_key (str): optional key identifying the posting across retries
         Returns:
-            True if successful
+            True if successful, or if a transaction with idempotency_key was already added
         Raises:
             TransactionSequenceError if date is before latest transaction date
+            IdempotencyKeyError if idempotency_key was already used with a different amount or date
         """
-        if self._transactions:
-            latest_date = max(t.get_date() for t in self._transactions)
-            if date < latest_date:
-                raise TransactionSequenceError(latest_date)
-        new_transaction = Transaction(date, amount)
-        self._transactions.append(new_transaction)
+        ledger = self.get_ledger()
+        latest_date = ledger.latest_date()
+        if latest_date and date < latest_date:
+            raise TransactionSequenceError(latest_date)
+        if idempotency_key is None:
+            new_transaction = Transaction(date, amount, kind)
+            # setting the backref does not load the full list of transactions
+            new_transaction.account = self
+            session.add(new_transaction)
+        else:
+            if self._id is None:
+                session.flush()
+            # another session may have posted the same key since already_posted checked
+            if not idempotency.insert_transaction(session, self._id, idempotency_key, amount, date, kind):
+                return True
+            # the row was inserted without a Transaction object, so reload the list if it was loaded
+            if "_transactions" not in inspect(self).unloaded:
+                session.expire(self, ["_transactions"])
         self._balance += amount
-        session.add(new_transaction)
+        ledger.append(date, amount)
+        self._monthly_summary(date).record(amount, kind, self._balance)
         return True
 
-    def list_transactions(self):
-        """List all transactions sorted by date."""
-        transactions = self._transactions
-        transactions.sort(key=lambda t: t.get_date())
-        [print(t) for t in transactions]
+    def already_posted(self, idempotency_key, amount, date, session):
+        """Return True if a transaction with this idempotency key was already added to the account.
+
+        Raises:
+            IdempotencyKeyError if it was added with a different amount or date
+        """
+        return idempotency_key is not None and idempotency.already_posted(session, self._id, idempotency_key, amount, date)
+
+    def _monthly_summary(self, date):
+        """Return the summary of the month date falls in, creating it if needed."""
+        month = date.replace(day=1)
+        if month not in self._monthly_summaries:
+            self._monthly_summaries[month] = MonthlySummary(month)
+        return self._monthly_summaries[month]
+
+    def get_monthly_summaries(self):
+        """Return a list of monthly summaries sorted by month."""
+        return sorted(self._monthly_summaries.values(), key=lambda s: s.get_month())
+
+    def rebuild_monthly_summaries(self, session):
+        """Recalculate the monthly summaries from the archived and current transactions.
+
+        Returns:
+            number of monthly summaries (int)
+        """
+        self._monthly_summaries.clear()
+        session.flush()
+        balance = decimal.Decimal(0)
+        # archived transactions all predate the ones still in the transaction table
+        current = sorted(self._transactions, key=lambda t: (t.get_date(), t._id))
+        for t in chain(self.get_archived_transactions(), current):
+            balance += t.get_amount()
+            self._monthly_summary(t.get_date()).record(t.get_amount(), t.get_kind(), balance)
+        return len(self._monthly_summaries)
+
+    def get_rollups(self):
+        """Return a list of monthly rollups of archived transactions."""
+        return self._rollups
+
+    def get_archived_transactions(self, month=None):
+        """Return archived transactions sorted by date.
+
+        Args:
+            month (datetime.date): first date of a month to restrict to, or None for all
+        """
+        query = self._archived_transactions
+        if month:
+            query = query.filter(ArchivedTransaction._date >= month, ArchivedTransaction._date <= last_date_of_month(month))
+        return query.order_by(ArchivedTransaction._date, ArchivedTransaction._id).all()
+
+    def list_transactions(self, include_archived=False):
+        """List all transactions sorted by date.
+
+        Archived months are listed as monthly rollups unless include_archived is True.
+        """
+        if include_archived:
+            [print(t) for t in self.get_archived_transactions()]
+        else:
+            [print(r) for r in self._rollups]
+        [print(t) for t in self.get_ledger()]
+
+    def archive_closed_months(self, session):
+        """Move transactions of closed months into the archive, leaving a rollup per month.
+
+        A month is closed once interest and fees have been applied for it and a
+        later month has transactions, so no new transaction can be dated in it.
+
+        Returns:
+            number of transactions archived (int)
+        """
+        if not self._latest_interest_date or not self._transactions:
+            return 0
+        latest_date = max(t.get_date() for t in self._transactions)
+        cutoff = min(self._latest_interest_date, latest_date.replace(day=1) - datetime.timedelta(days=1))
+        closed = sorted((t for t in self._transactions if t.get_date() <= cutoff), key=lambda t: t.get_date())
+        if not closed:
+            return 0
+        # walk back from the current balance to get each closed month's closing balance
+        closing_balance = self._balance - sum(t.get_amount() for t in self._transactions if t.get_date() > cutoff)
+        months = [(month, list(group)) for month, group in groupby(closed, key=lambda t: t.get_date().replace(day=1))]
+        for month, transactions in reversed(months):
+            net_amount = sum(t.get_amount() for t in transactions)
+            self._rollups.append(MonthlyRollup(month, len(transactions), net_amount, closing_balance))
+            closing_balance -= net_amount
+        for t in closed:
+            self._archived_transactions.append(ArchivedTransaction(t.get_date(), t.get_amount(), t.get_kind(), t._idempotency_key))
+            self._transactions.remove(t)
+            session.delete(t)
+        self._rollups.sort(key=lambda r: r.get_month())
+        self._ledger = None
+        return len(closed)
     
     def apply_interest_and_fees(self, interest, fees, session):
         """Apply interest and fees by adding relevant calculated transactions.
@@ -76,20 +224,31 @@ class Account(Base):
             fees (decimal.Decimal): fees
         Returns:
             ((applied_interest, interest), (applied_fees, fees)) (tuple of tuples)
+        Raises:
+            NoTransactionsError if the account has no transactions
         """
         applied_interest, applied_fees = False, False
-        if self._transactions:
-            latest_transaction_date = max(t.get_date() for t in self._transactions)
+        last_date_of_month = self._interest_month_end()
+        latest_transaction_date = self.get_ledger().latest_date()
         if self._latest_interest_date and self._latest_interest_date >= latest_transaction_date:
             raise TransactionSequenceError(latest_transaction_date)
-        month, year = self._transactions[-1].get_date().month, self._transactions[-1].get_date().year
-        last_day = {1: 31, 2: 28, 3: 31, 4: 30, 5:31, 6: 30, 7: 31, 8: 31, 9: 30, 10:31, 11: 30, 12: 31}
-        last_date_of_month = datetime.datetime.strptime(str(year) + "-" + str(month) + "-" + str(last_day[month]), "%Y-%m-%d").date()
-        res = self.add_transaction(interest, last_date_of_month, session, True)
+        res = self.add_transaction(interest, last_date_of_month, session, True, kind="interest")
         if fees > 0:
-            res = self.add_transaction(-1 * fees, last_date_of_month, session, True)
+            res = self.add_transaction(-1 * fees, last_date_of_month, session, True, kind="fee")
             applied_fees = True
         if res:
             self._latest_interest_date = last_date_of_month
             applied_interest = True
-        return ((applied_interest, interest), (applied_fees, -1 * fees))
\ No newline at end of file
+        return ((applied_interest, interest), (applied_fees, -1 * fees))
+
+@event.listens_for(Account, "expire", propagate=True)
+def _discard_ledger_on_expire(account, attrs):
+    """Drop the cached ledger when the whole account is expired, as other sessions may have posted."""
+    if account is not None and attrs is None:
+        account._ledger = None
+
+@event.listens_for(Account, "refresh", propagate=True)
+def _discard_ledger_on_refresh(account, context, attrs):
+    """Drop the cached ledger when the account is refreshed, as other sessions may have posted."""
+    if account is not None:
+        account._ledger = None
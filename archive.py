@@ -0,0 +1,72 @@
+from transaction import Base
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Index
+
+class ArchivedTransaction(Base):
+    """A transaction moved out of the transaction table once its month was closed."""
+
+    __tablename__ = "transaction_archive"
+    __table_args__ = (Index("ix_transaction_archive_account_idempotency_key", "_account_id", "_idempotency_key", unique=True),)
+    _id = Column(Integer, primary_key=True)
+    _account_id = Column(Integer, ForeignKey("account._id"), index=True)
+    _amount = Column(Float(asdecimal=True))
+    _date = Column(Date)
+    # kind of the original transaction, see Transaction._kind
+    _kind = Column(String)
+    _idempotency_key = Column(String)
+
+    def __init__(self, date, amount, kind=None, idempotency_key=None):
+        self._amount = amount
+        self._date = date
+        self._kind = kind
+        self._idempotency_key = idempotency_key
+
+    def get_date(self):
+        """Return the date of the transaction."""
+        return self._date
+
+    def get_amount(self):
+        """Return the amount of the transaction."""
+        return self._amount
+
+    def get_kind(self):
+        """Return the kind of the transaction."""
+        return self._kind
+
+    def __str__(self):
+        return f"{self._date.strftime('%Y-%m-%d')}, ${self._amount:,.2f}"
+
+class MonthlyRollup(Base):
+    """Summary of an account's archived transactions for one month."""
+
+    __tablename__ = "transaction_rollup"
+    _id = Column(Integer, primary_key=True)
+    _account_id = Column(Integer, ForeignKey("account._id"))
+    _month = Column(Date)
+    _count = Column(Integer)
+    _net_amount = Column(Float(asdecimal=True))
+    _closing_balance = Column(Float(asdecimal=True))
+
+    def __init__(self, month, count, net_amount, closing_balance):
+        self._month = month
+        self._count = count
+        self._net_amount = net_amount
+        self._closing_balance = closing_balance
+
+    def get_month(self):
+        """Return the first date of the month."""
+        return self._month
+
+    def get_count(self):
+        """Return the number of archived transactions in the month."""
+        return self._count
+
+    def get_amount(self):
+        """Return the net amount of the month's transactions."""
+        return self._net_amount
+
+    def get_closing_balance(self):
+        """Return the balance at the end of the month."""
+        return self._closing_balance
+
+    def __str__(self):
+        return f"{self._month.strftime('%Y-%m')}, ${self._net_amount:,.2f} ({self._count} archived, closing ${self._closing_balance:,.2f})"
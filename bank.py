@@ -1,6 +1,9 @@
 from transaction import Base
 from sqlalchemy import Column, Integer, String, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, selectinload, with_parent, with_polymorphic
+from account import Account
+from ledger import Ledger
+from exceptions import TransactionSequenceError
 from checking_account import CheckingAccount
 from savings_account import SavingsAccount
 
@@ -50,4 +53,46 @@ class Bank(Base):
     
     def get_accounts(self):
         """Return a list of all accounts."""
-        return self._accounts
\ No newline at end of file
+        return self._accounts
+
+    def apply_interest_and_fees(self, session):
+        """Apply interest and fees to all accounts in one pass.
+
+        Accounts, their ledgers and monthly summaries are loaded in a few batch
+        queries rather than lazily one account at a time. Accounts without transactions, or that have
+        already had interest and fees applied this month, are skipped.
+
+        Returns:
+            results (dict): account_number -> ((applied_interest, interest), (applied_fees, fees))
+        """
+        # load the savings/checking columns and monthly summaries in batches rather than one lazy load per account
+        polymorphic_account = with_polymorphic(Account, "*")
+        accounts = session.query(polymorphic_account).filter(with_parent(self, Bank._accounts)) \
+            .options(selectinload(polymorphic_account._monthly_summaries)).all()
+        ledgers = Ledger.load(session, [account._id for account in accounts])
+        results = {}
+        for account in accounts:
+            account._ledger = ledgers[account._id]
+            if not account.get_ledger():
+                continue
+            try:
+                results[account.get_account_number()] = account.apply_interest_and_fees(session)
+            except TransactionSequenceError:
+                continue
+        return results
+
+    def archive_closed_months(self, session):
+        """Archive the transactions of closed months for all accounts.
+
+        Returns:
+            number of transactions archived (int)
+        """
+        return sum(account.archive_closed_months(session) for account in self._accounts)
+
+    def rebuild_monthly_summaries(self, session):
+        """Recalculate the monthly summaries of all accounts from their transactions.
+
+        Returns:
+            number of monthly summaries (int)
+        """
+        return sum(account.rebuild_monthly_summaries(session) for account in self._accounts)
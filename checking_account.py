@@ -1,5 +1,6 @@
 from exceptions import OverdrawError
 from account import Account
+from interest import AverageDailyBalancePolicy
 from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
 from sqlalchemy.orm import relationship
 import decimal
@@ -17,27 +18,34 @@ class CheckingAccount(Account):
         "polymorphic_identity":"checking"
     }
 
+    _interest_policy = AverageDailyBalancePolicy()
+
     def __init__(self, account_number):
         super().__init__(account_number)
         self._fees = decimal.Decimal(0.0)
         self._interest_rate = decimal.Decimal(0.08 / 100)
         self._type = "checking"
     
-    def add_transaction(self, amount, date, session, ignore_constraints=False):
+    def add_transaction(self, amount, date, session, ignore_constraints=False, kind=None, idempotency_key=None):
         """Add a transaction to a checking account after checking the constraints.
         
         Args:
             amount (decimal.Decimal)
             date (datetime.date)
             ignore_constraints (bool): ignore amount constraints if True
+            kind (str): "interest", "fee" or None for a deposit/withdrawal
+            idempotency_key (str): optional key identifying the posting across retries
         Returns:
-            True if successful
+            True if successful, or if a transaction with idempotency_key was already added
         Raises:
             OverdrawError if account has insufficient funds
+            IdempotencyKeyError if idempotency_key was already used with a different amount or date
         """
+        if self.already_posted(idempotency_key, amount, date, session):
+            return True
         if not ignore_constraints and self.get_balance() + amount < 0: 
             raise OverdrawError("Account has insufficient funds.")
-        return super().add_transaction(amount, date, session)
+        return super().add_transaction(amount, date, session, kind, idempotency_key)
     
     def apply_interest_and_fees(self, session):
         """Apply interest and fees to a checking account."""
@@ -45,7 +53,7 @@ class CheckingAccount(Account):
             self._fees = decimal.Decimal(5.44)
         else:
             self._fees = decimal.Decimal(0.0)
-        return super().apply_interest_and_fees(self.get_balance() * self._interest_rate, self._fees, session)
+        return super().apply_interest_and_fees(self.get_interest_base() * self._interest_rate, self._fees, session)
     
     def __str__(self):
         return f"Checking#{self._account_number:09},\tbalance: ${self._balance:,.2f}"
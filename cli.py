@@ -2,9 +2,9 @@ from bank import Bank
 import sys
 from datetime import datetime
 import decimal 
-from exceptions import OverdrawError, TransactionSequenceError, TransactionLimitError
+from exceptions import OverdrawError, TransactionSequenceError, TransactionLimitError, NoTransactionsError
 import logging
-from transaction import Base
+from schema import create_schema
 import sqlalchemy
 from sqlalchemy.orm.session import sessionmaker
 
@@ -37,7 +37,10 @@ class BankCLI:
             "4": self._add_transaction,
             "5": self._list_transactions,
             "6": self._interest_and_fees,
-            "7": self._quit
+            "7": self._archive_closed_months,
+            "8": self._monthly_summary,
+            "9": self._rebuild_monthly_summaries,
+            "10": self._quit
         }
     
     def _display_menu(self):
@@ -51,7 +54,10 @@ Enter command
 4: add transaction
 5: list transactions
 6: interest and fees
-7: quit
+7: archive closed months
+8: monthly summary
+9: rebuild monthly summaries
+10: quit
 >""", 
     end="")
 
@@ -132,12 +138,15 @@ Enter command
             print("This command requires that you first select an account.")
 
     def _interest_and_fees(self):
+        if not self._selected_account:
+            print("This command requires that you first select an account.")
+            return
         try:
             # expecting a tuple that returns the status of the interest and fees transactions
             interest_details, fees_details = self._selected_account.apply_interest_and_fees(self._session) # need to pass in session to apply_interest_and_fees
             self._session.commit()
-        except AttributeError:
-            print("This command requires that you first select an account.")
+        except NoTransactionsError:
+            print("Interest and fees can only be applied to an account with transactions.")
         except TransactionSequenceError as e:
             month_name = datetime.strptime(str(e.latest_date.month), "%m").strftime("%B")
             print("Cannot apply interest and fees again in the month of {}.".format(month_name))
@@ -150,6 +159,27 @@ Enter command
                 logging.debug(f"Created transaction: {self._selected_account.get_account_number()}, {fees_details[1]}")
             logging.debug("Triggered interest and fees")
             logging.debug("Saved to bank.db")
+
+    def _archive_closed_months(self):
+        archived_count = self._bank.archive_closed_months(self._session)
+        self._session.commit()
+        print(f"Archived {archived_count} transactions.")
+        logging.debug(f"Archived transactions: {archived_count}")
+        logging.debug("Saved to bank.db")
+
+    def _monthly_summary(self):
+        try:
+            [print(s) for s in self._selected_account.get_monthly_summaries()]
+        except AttributeError:
+            print("This command requires that you first select an account.")
+
+    def _rebuild_monthly_summaries(self):
+        summary_count = self._bank.rebuild_monthly_summaries(self._session)
+        self._session.commit()
+        print(f"Rebuilt {summary_count} monthly summaries.")
+        logging.debug(f"Rebuilt monthly summaries: {summary_count}")
+        logging.debug("Saved to bank.db")
+
     def _quit(self):
         sys.exit()
     
@@ -158,7 +188,7 @@ if __name__ == "__main__":
                     format='%(asctime)s|%(levelname)s|%(message)s', datefmt='%Y-%m-%d %H:%M:%S')
     
     engine = sqlalchemy.create_engine('sqlite:///bank.db')
-    Base.metadata.create_all(engine)
+    create_schema(engine)
     Session = sessionmaker()
     Session.configure(bind=engine)
 
@@ -10,7 +10,9 @@ class TransactionStack(tk.Frame):
         self._transactions = transactions
         self._labels = []
         for transaction in self._transactions:
-            newLabel = ttk.Label(parent, text=str(transaction), width=25, anchor=tk.CENTER, justify=tk.CENTER)
+            text = str(transaction)
+            # monthly rollups of archived transactions are longer than a single transaction
+            newLabel = ttk.Label(parent, text=text, width=max(25, len(text)), anchor=tk.CENTER, justify=tk.CENTER)
             if transaction.get_amount() < 0:
                 newLabel.config(foreground="red")
             newLabel.pack(padx=10, ipady=10, pady=2)
@@ -20,6 +22,26 @@ class TransactionStack(tk.Frame):
         for label in self._labels:
             label.destroy()
 
+class MonthlySummaryStack(tk.Frame):
+    """ A stack of labels representing an account's monthly summaries"""
+    def __init__(self, parent, summaries, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self._summaries = summaries
+        self._labels = []
+        for summary in self._summaries:
+            text = (f"{summary.get_month().strftime('%B %Y')}: {summary.get_count()} transactions\n"
+                    f"deposits ${summary.get_deposits():,.2f}, withdrawals ${summary.get_withdrawals():,.2f}\n"
+                    f"interest ${summary.get_interest():,.2f}, fees ${summary.get_fees():,.2f}\n"
+                    f"closing balance ${summary.get_closing_balance():,.2f}")
+            # natural width, as the figures grow with the amounts
+            newLabel = ttk.Label(parent, text=text, width=0, anchor=tk.CENTER, justify=tk.CENTER)
+            newLabel.pack(padx=10, ipady=5, pady=2)
+            self._labels.append(newLabel)
+
+    def delete(self):
+        for label in self._labels:
+            label.destroy()
+
 class SummaryStack(tk.Frame):
     """ A stack of selectable radio buttons representing accounts"""
     def __init__(self, parent, accounts,select_account, *args, **kwargs):
@@ -9,8 +9,17 @@ class TransactionSequenceError(Exception):
         self.latest_date = date
         self.interest_error = interest_error
 
+class NoTransactionsError(Exception):
+    """Raised when applying interest and fees to an account that has no transactions."""
+    pass
+
 class TransactionLimitError(Exception):
     """Raised when trying to add a transaction to a savings account that already has 5 transactions in the this month or 2 transactions in this day."""
     def __init__(self, mc, dc):
         self.month_violated = mc
-        self.day_violated = dc
\ No newline at end of file
+        self.day_violated = dc
+
+class IdempotencyKeyError(Exception):
+    """Raised when an idempotency key is reused for a transaction with a different amount or date."""
+    def __init__(self, key):
+        self.key = key
@@ -2,15 +2,15 @@ from bank import Bank
 import sys
 from datetime import datetime
 import decimal
-from exceptions import OverdrawError, TransactionSequenceError, TransactionLimitError
+from exceptions import OverdrawError, TransactionSequenceError, TransactionLimitError, NoTransactionsError
 import logging
-from transaction import Base
+from schema import create_schema
 import sqlalchemy
 from sqlalchemy.orm.session import sessionmaker
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-from custom import TransactionStack, SummaryStack
+from custom import TransactionStack, SummaryStack, MonthlySummaryStack
 from tkcalendar import Calendar, DateEntry
 from checking_account import CheckingAccount
 from savings_account import SavingsAccount
@@ -45,7 +45,7 @@ class BankGUI:
         """Initialize the root window."""
         self._root_window = tk.Tk()
         self._root_window.title("MY BANK")
-        self._root_window.geometry("750x500")
+        self._root_window.geometry("1050x500")
         ttk.Style(self._root_window).theme_use("clam")
         self._root_window.report_callback_exception = handle_exception
         self._root_window.grid_columnconfigure(0, weight=1)
@@ -72,9 +72,11 @@ class BankGUI:
         self._summary_frame = tk.Frame(self._root_window)
         self._add_transaction_frame = tk.Frame(self._root_window)
         self._list_transactions_frame = tk.Frame(self._root_window)
+        self._account_detail_frame = tk.Frame(self._root_window)
 
         self._summary_frame.grid(row=2, column=0, sticky=tk.NSEW)
         self._list_transactions_frame.grid(row=2, column=1, sticky=tk.NSEW)
+        self._account_detail_frame.grid(row=2, column=2, sticky=tk.NSEW)
 
 
     def _open_account_gui(self):
@@ -225,17 +227,28 @@ class BankGUI:
         """Fills in the list transactions frame."""
         if hasattr(self, "_list_transactions_widget"):
             self._list_transactions_widget.delete()
-        self._transactions = self._selected_account.get_transactions()
+        # archived months are shown as a single rollup each
+        self._transactions = list(self._selected_account.get_rollups()) + list(self._selected_account.get_ledger())
         self._list_transactions_widget = TransactionStack(self._list_transactions_frame, self._transactions)
+        self._account_detail()
+
+    def _account_detail(self):
+        """Fills in the account detail frame with the selected account's monthly summaries."""
+        if hasattr(self, "_account_detail_widget"):
+            self._account_detail_widget.delete()
+        self._account_detail_widget = MonthlySummaryStack(self._account_detail_frame, self._selected_account.get_monthly_summaries())
 
     def _interest_and_fees(self):
         """Applies interest and fees to the selected account."""
+        if not self._selected_account:
+            messagebox.showwarning("No Account Selected", "This command requires that you first select an account.")
+            return
         try:
             # expecting a tuple that returns the status of the interest and fees transactions
             interest_details, fees_details = self._selected_account.apply_interest_and_fees(self._session)
             self._session.commit()
-        except AttributeError:
-            messagebox.showwarning("No Account Selected", "This command requires that you first select an account.")
+        except NoTransactionsError:
+            messagebox.showwarning("No Transactions", "Interest and fees can only be applied to an account with transactions.")
         except TransactionSequenceError as e:
             month_name = datetime.strptime(str(e.latest_date.month), "%m").strftime("%B")
             messagebox.showwarning("Applying Again", "Cannot apply interest and fees again in the month of {}.".format(month_name))
@@ -262,7 +275,7 @@ if __name__ == "__main__":
     logging.basicConfig(filename='bank.log', level=logging.DEBUG, 
                     format='%(asctime)s|%(levelname)s|%(message)s', datefmt='%Y-%m-%d %H:%M:%S')
     engine = sqlalchemy.create_engine('sqlite:///bank.db')
-    Base.metadata.create_all(engine)
+    create_schema(engine)
     Session = sessionmaker()
     Session.configure(bind=engine)
     BankGUI()
@@ -0,0 +1,123 @@
+from transaction import Transaction
+from archive import ArchivedTransaction
+from exceptions import IdempotencyKeyError
+from collections import OrderedDict
+import time
+import weakref
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+import decimal
+decimal.getcontext().rounding = decimal.ROUND_HALF_UP
+
+CENT = decimal.Decimal("0.01")
+
+class RecentKeys:
+    """A bounded LRU of recently committed postings, keyed by (account id, idempotency key).
+
+    Account ids are only unique within one database, so each engine has its
+    own RecentKeys, see recent_keys. Entries expire after ttl seconds, so a
+    stale entry can only ever cause a fall back to the database lookup.
+    """
+
+    def __init__(self, size=10000, ttl=600):
+        self._size = size
+        self._ttl = ttl
+        self._postings = OrderedDict()
+
+    def add(self, key, posting):
+        """Remember a committed posting.
+
+        Args:
+            key (tuple): (account id, idempotency key)
+            posting (tuple): (amount, date)
+        """
+        self._postings[key] = (posting, time.monotonic() + self._ttl)
+        self._postings.move_to_end(key)
+        while len(self._postings) > self._size:
+            self._postings.popitem(last=False)
+
+    def get(self, key):
+        """Return the (amount, date) posted with key, or None if it is not remembered."""
+        entry = self._postings.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._postings[key]
+            return None
+        self._postings.move_to_end(key)
+        return entry[0]
+
+    def clear(self):
+        """Forget all postings."""
+        self._postings.clear()
+
+_recent_keys = weakref.WeakKeyDictionary()
+
+def recent_keys(session):
+    """Return the recent postings of the database the session is bound to."""
+    engine = session.get_bind().engine
+    if engine not in _recent_keys:
+        _recent_keys[engine] = RecentKeys()
+    return _recent_keys[engine]
+
+def already_posted(session, account_id, key, amount, date):
+    """Return True if the account already has a transaction with this idempotency key.
+
+    Checks the recent postings, then the transaction and archive tables.
+
+    Raises:
+        IdempotencyKeyError if that transaction has a different amount or date
+    """
+    if account_id is None:
+        return False
+    posting = recent_keys(session).get((account_id, key)) or _find(session, account_id, key)
+    if posting is None:
+        return False
+    if decimal.Decimal(posting[0]).quantize(CENT) != decimal.Decimal(amount).quantize(CENT) or posting[1] != date:
+        raise IdempotencyKeyError(key)
+    return True
+
+def _find(session, account_id, key):
+    for model in (Transaction, ArchivedTransaction):
+        row = session.query(model._amount, model._date).filter(model._account_id == account_id, model._idempotency_key == key).first()
+        if row:
+            posting = tuple(row)
+            # only remember postings committed by other sessions, as this one may still roll back
+            if (account_id, key) not in session.info.get("idempotency_keys", {}):
+                recent_keys(session).add((account_id, key), posting)
+            return posting
+    return None
+
+def insert_transaction(session, account_id, key, amount, date, kind=None):
+    """Insert a transaction with an idempotency key unless the account already has one.
+
+    The unique index is checked by the insert itself, so a session that loses a
+    race with another posting the same key gets False rather than an
+    IntegrityError, and the rest of its work is kept.
+
+    Returns:
+        True if inserted, False if the key was already posted
+    Raises:
+        IdempotencyKeyError if the existing transaction has a different amount or date
+    """
+    statement = insert(Transaction.__table__).values(_account_id=account_id, _amount=amount, _date=date,
+                                                     _kind=kind, _idempotency_key=key)
+    result = session.execute(statement.on_conflict_do_nothing(index_elements=["_account_id", "_idempotency_key"]))
+    if result.rowcount == 0:
+        already_posted(session, account_id, key, amount, date)
+        return False
+    session.info.setdefault("idempotency_keys", {})[(account_id, key)] = (amount, date)
+    return True
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed_keys(session):
+    postings = session.info.pop("idempotency_keys", {})
+    if postings:
+        cache = recent_keys(session)
+        for key, posting in postings.items():
+            cache.add(key, posting)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_keys(session):
+    session.info.pop("idempotency_keys", None)
@@ -0,0 +1,47 @@
+import calendar
+import datetime
+from itertools import accumulate
+import decimal
+decimal.getcontext().rounding = decimal.ROUND_HALF_UP
+
+def last_date_of_month(date):
+    """Return the last date of the month that date falls in."""
+    return datetime.date(date.year, date.month, calendar.monthrange(date.year, date.month)[1])
+
+def average_daily_balance(transactions, closing_balance, month_end):
+    """Return the average daily balance over the month ending on month_end.
+
+    Builds a running-balance prefix array over the month's transactions only,
+    so the cost is O(transactions in month) rather than a day-by-day replay.
+
+    Args:
+        transactions (list of Transaction or LedgerEntry): the account's transactions
+        closing_balance (decimal.Decimal): balance at the end of the month
+        month_end (datetime.date): last date of the month
+    Returns:
+        average daily balance (decimal.Decimal)
+    """
+    month_start = month_end.replace(day=1)
+    in_month = sorted((t for t in transactions if month_start <= t.get_date() <= month_end), key=lambda t: t.get_date())
+    amounts = [t.get_amount() for t in in_month]
+    opening_balance = closing_balance - sum(amounts, decimal.Decimal(0))
+    # balances[i] is the balance from day days[i] up to (not including) day days[i + 1]
+    balances = list(accumulate(amounts, initial=opening_balance))
+    days = [1] + [t.get_date().day for t in in_month] + [month_end.day + 1]
+    total = sum((balances[i] * (days[i + 1] - days[i]) for i in range(len(balances))), decimal.Decimal(0))
+    return total / month_end.day
+
+class CurrentBalancePolicy:
+    """Interest on the balance at the moment interest is applied."""
+
+    def interest_base(self, account, month_end):
+        """Return the balance that interest is calculated on."""
+        return account.get_balance()
+
+class AverageDailyBalancePolicy:
+    """Interest on the average daily balance for the month."""
+
+    def interest_base(self, account, month_end):
+        """Return the balance that interest is calculated on."""
+        transactions = account.get_ledger().between(month_end.replace(day=1), month_end)
+        return average_daily_balance(transactions, account.get_balance(), month_end)
@@ -0,0 +1,89 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+from operator import itemgetter
+import datetime
+import decimal
+decimal.getcontext().rounding = decimal.ROUND_HALF_UP
+
+# SQLite converts dates to proleptic Gregorian ordinals and amounts to cents itself
+LEDGER_QUERY = '''SELECT _account_id, CAST(julianday(_date) - 1721424.5 AS INTEGER), CAST(ROUND(_amount * 100) AS INTEGER)
+FROM "transaction" WHERE _account_id IN ({}) ORDER BY _account_id, _date, _id'''
+
+class LedgerEntry:
+    """A read-only transaction record from a ledger."""
+
+    __slots__ = ("_date", "_amount")
+
+    def __init__(self, date, amount):
+        self._date = date
+        self._amount = amount
+
+    def get_date(self):
+        """Return the date of the transaction."""
+        return self._date
+
+    def get_amount(self):
+        """Return the amount of the transaction."""
+        return self._amount
+
+    def __str__(self):
+        return f"{self._date.strftime('%Y-%m-%d')}, ${self._amount:,.2f}"
+
+class Ledger:
+    """Read-only view of an account's transactions sorted by date.
+
+    Stores parallel arrays of date ordinals and integer cents instead of
+    Transaction objects, so date ranges are found by binary search.
+    """
+
+    def __init__(self):
+        self._ordinals = array("l")
+        self._cents = array("q")
+
+    @classmethod
+    def load(cls, session, account_ids):
+        """Build ledgers for several accounts with a single raw SQL query.
+
+        Args:
+            account_ids (list of int)
+        Returns:
+            ledgers (dict): account_id -> Ledger, for every requested account
+        """
+        ledgers = {account_id: cls() for account_id in account_ids}
+        if not ledgers:
+            return ledgers
+        query = LEDGER_QUERY.format(", ".join("?" * len(ledgers)))
+        rows = session.connection().exec_driver_sql(query, tuple(ledgers)).fetchall()
+        for account_id, group in groupby(rows, key=itemgetter(0)):
+            group = list(group)
+            ledgers[account_id]._ordinals.extend(map(itemgetter(1), group))
+            ledgers[account_id]._cents.extend(map(itemgetter(2), group))
+        return ledgers
+
+    def append(self, date, amount):
+        """Append a transaction dated on or after the latest one."""
+        self._ordinals.append(date.toordinal())
+        self._cents.append(int((amount * 100).to_integral_value()))
+
+    def latest_date(self):
+        """Return the date of the latest transaction, or None if there are none."""
+        return datetime.date.fromordinal(self._ordinals[-1]) if self._ordinals else None
+
+    def count_between(self, start, end):
+        """Return the number of transactions dated from start to end inclusive."""
+        return bisect_right(self._ordinals, end.toordinal()) - bisect_left(self._ordinals, start.toordinal())
+
+    def between(self, start, end):
+        """Return the transactions dated from start to end inclusive."""
+        low, high = bisect_left(self._ordinals, start.toordinal()), bisect_right(self._ordinals, end.toordinal())
+        return [self._entry(i) for i in range(low, high)]
+
+    def _entry(self, i):
+        return LedgerEntry(datetime.date.fromordinal(self._ordinals[i]), decimal.Decimal(self._cents[i]).scaleb(-2))
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __iter__(self):
+        return (self._entry(i) for i in range(len(self._ordinals)))
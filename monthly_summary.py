@@ -0,0 +1,78 @@
+from transaction import Base
+from sqlalchemy import Column, Integer, Date, Float, ForeignKey
+import decimal
+decimal.getcontext().rounding = decimal.ROUND_HALF_UP
+
+class MonthlySummary(Base):
+    """Totals of an account's transactions for one month, kept up to date as transactions are added."""
+
+    __tablename__ = "monthly_summary"
+    _account_id = Column(Integer, ForeignKey("account._id"), primary_key=True)
+    _month = Column(Date, primary_key=True)
+    _deposits = Column(Float(asdecimal=True))
+    _withdrawals = Column(Float(asdecimal=True))
+    _count = Column(Integer)
+    _interest = Column(Float(asdecimal=True))
+    _fees = Column(Float(asdecimal=True))
+    _closing_balance = Column(Float(asdecimal=True))
+
+    def __init__(self, month):
+        self._month = month
+        self._deposits = decimal.Decimal(0)
+        self._withdrawals = decimal.Decimal(0)
+        self._count = 0
+        self._interest = decimal.Decimal(0)
+        self._fees = decimal.Decimal(0)
+        self._closing_balance = decimal.Decimal(0)
+
+    def record(self, amount, kind, balance):
+        """Add a transaction to the totals.
+
+        Args:
+            amount (decimal.Decimal)
+            kind (str): "interest", "fee" or None for a deposit/withdrawal
+            balance (decimal.Decimal): account balance after the transaction
+        """
+        self._count += 1
+        if kind == "interest":
+            self._interest += amount
+        elif kind == "fee":
+            self._fees -= amount
+        elif amount >= 0:
+            self._deposits += amount
+        else:
+            self._withdrawals -= amount
+        self._closing_balance = balance
+
+    def get_month(self):
+        """Return the first date of the month."""
+        return self._month
+
+    def get_count(self):
+        """Return the number of transactions in the month."""
+        return self._count
+
+    def get_deposits(self):
+        """Return the total deposited in the month."""
+        return self._deposits
+
+    def get_withdrawals(self):
+        """Return the total withdrawn in the month."""
+        return self._withdrawals
+
+    def get_interest(self):
+        """Return the interest earned in the month."""
+        return self._interest
+
+    def get_fees(self):
+        """Return the fees charged in the month."""
+        return self._fees
+
+    def get_closing_balance(self):
+        """Return the balance at the end of the month."""
+        return self._closing_balance
+
+    def __str__(self):
+        return (f"{self._month.strftime('%Y-%m')}, {self._count} transactions, deposits ${self._deposits:,.2f}, "
+                f"withdrawals ${self._withdrawals:,.2f}, interest ${self._interest:,.2f}, fees ${self._fees:,.2f}, "
+                f"closing ${self._closing_balance:,.2f}")
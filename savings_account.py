@@ -1,5 +1,6 @@
 from exceptions import OverdrawError, TransactionLimitError
 from account import Account
+from interest import AverageDailyBalancePolicy, last_date_of_month
 from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
 from sqlalchemy.orm import relationship
 import decimal
@@ -16,44 +17,49 @@ class SavingsAccount(Account):
     __mapper_args__ = {
         "polymorphic_identity" : "saving"
     }
-    
+
+    _interest_policy = AverageDailyBalancePolicy()
+
     def __init__(self, account_number):
         super().__init__(account_number)
         self._fees = decimal.Decimal(0.0)
         self._interest_rate = decimal.Decimal(0.41 / 100)
         self._type = "saving"
 
-    def add_transaction(self, amount, date, session, ignore_constraints=False):
+    def add_transaction(self, amount, date, session, ignore_constraints=False, kind=None, idempotency_key=None):
         """Add a transaction to a savings account after checking the constraints.
         
         Args:
             amount (decimal.Decimal)
             date (datetime.date)
             ignore_constraints (bool): ignore amount constraints if True
+            kind (str): "interest", "fee" or None for a deposit/withdrawal
+            idempotency_key (str): optional key identifying the posting across retries
         Returns:
-            True if successful
+            True if successful, or if a transaction with idempotency_key was already added
         Raises:
             OverdrawError if account has insufficient funds
+            IdempotencyKeyError if idempotency_key was already used with a different amount or date
+            TransactionLimitError if a deposit/withdrawal exceeds the monthly or daily limit
         """
+        if self.already_posted(idempotency_key, amount, date, session):
+            return True
         if not ignore_constraints and self.get_balance() + amount < 0: 
             raise OverdrawError
-        transactions = self.get_transactions()
-        month_count, day_count = 0, 0
-        if len(transactions) >= 2:
-            for t in transactions:
-                if t.get_date().month == date.month and t.get_date().year == date.year:
-                    month_count += 1
-                    if t.get_date().day == date.day:
-                        day_count += 1
-                if month_count >= 5 or day_count >= 2:
-                    # raise exception with boolean arguments to indicate which constraint was violated
-                    raise TransactionLimitError(month_count >= 5, day_count >= 2)
-        return super().add_transaction(amount, date, session)
+        ledger = self.get_ledger()
+        # interest and fees are not customer transactions, so the limits do not apply to them
+        if kind is None and len(ledger) >= 2:
+            month_count = ledger.count_between(date.replace(day=1), last_date_of_month(date))
+            day_count = ledger.count_between(date, date)
+            if month_count >= 5 or day_count >= 2:
+                # raise exception with boolean arguments to indicate which constraint was violated
+                raise TransactionLimitError(month_count >= 5, day_count >= 2)
+        return super().add_transaction(amount, date, session, kind, idempotency_key)
 
 
     def apply_interest_and_fees(self, session):
         """Apply interest and fees to a savings account."""
-        return super().apply_interest_and_fees(self.get_balance() * self._interest_rate, self._fees, session)
+        return super().apply_interest_and_fees(self.get_interest_base() * self._interest_rate, self._fees, session)
 
     def __str__(self):
         return f"Savings#{self._account_number:09},\tbalance: ${self._balance:,.2f}"
\ No newline at end of file
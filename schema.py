@@ -0,0 +1,35 @@
+from transaction import Base, Transaction
+from archive import ArchivedTransaction
+from monthly_summary import MonthlySummary
+from bank import Bank
+import sqlalchemy
+from sqlalchemy.orm.session import sessionmaker
+
+def create_schema(engine):
+    """Create missing tables, then add any columns and indexes the existing tables lack.
+
+    Lets databases created by an earlier version keep working. Added columns
+    must be nullable, as existing rows have no value for them. Monthly
+    summaries are backfilled for databases that have transactions but none.
+    """
+    Base.metadata.create_all(engine)
+    inspector = sqlalchemy.inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {column.name} {column_type}')
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    _backfill_monthly_summaries(engine)
+
+def _backfill_monthly_summaries(engine):
+    """Rebuild the monthly summaries if there are transactions but no summaries yet."""
+    session = sessionmaker(bind=engine)()
+    if not session.query(MonthlySummary).first() and (session.query(Transaction).first() or session.query(ArchivedTransaction).first()):
+        for bank in session.query(Bank).all():
+            bank.rebuild_monthly_summaries(session)
+        session.commit()
+    session.close()
@@ -0,0 +1,269 @@
+from bank import Bank
+from account import Account
+from transaction import Transaction
+from archive import ArchivedTransaction
+from schema import create_schema
+from exceptions import OverdrawError, TransactionSequenceError, TransactionLimitError, NoTransactionsError
+import argparse
+import contextlib
+import datetime
+import decimal
+import functools
+import io
+import multiprocessing
+import random
+import time
+import sqlalchemy
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.session import sessionmaker
+
+OPERATIONS = ("open", "post", "interest", "list")
+
+# raised by the bank for invalid requests, counted as rejections rather than errors
+REJECTIONS = (OverdrawError, TransactionSequenceError, TransactionLimitError, NoTransactionsError)
+
+class LockTimeout(Exception):
+    """Raised when an operation could not get the database lock in time."""
+    pass
+
+def parse_mix(mix):
+    """Parse an operation mix such as "open=1,post=6,interest=1,list=2" into weights."""
+    weights = dict.fromkeys(OPERATIONS, 0)
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in weights:
+            raise argparse.ArgumentTypeError(f"unknown operation {name.strip()}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+def percentile(values, p):
+    """Return the p-th percentile of values using the nearest-rank method."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))]
+
+def _open(session, bank, rng, date):
+    bank.open_account(rng.choice(["checking", "savings"]), session)
+    return 0
+
+def _post(session, bank, rng, date, posting):
+    if posting["account_number"]:
+        account = bank.select_account(posting["account_number"])
+    else:
+        account = rng.choice(bank.get_accounts())
+    account.add_transaction(posting["amount"], date, session, idempotency_key=posting["key"])
+    # every worker posts each shared key, so those are counted once per key after the run
+    return 0 if posting["shared"] else 1
+
+def _replay(session, bank, rng, date):
+    # retry a posting committed by any worker, which must not create another transaction
+    row = session.query(Account, Transaction).join(Transaction, Transaction._account_id == Account._id) \
+        .filter(Transaction._idempotency_key.isnot(None)).order_by(func.random()).first()
+    if row:
+        account, transaction = row
+        account.add_transaction(transaction.get_amount(), transaction.get_date(), session,
+                                idempotency_key=transaction._idempotency_key)
+    return 0
+
+def _interest(session, bank, rng, date):
+    account = rng.choice(bank.get_accounts())
+    interest_details, fees_details = account.apply_interest_and_fees(session)
+    return int(interest_details[0]) + int(fees_details[0])
+
+def _list(session, bank, rng, date):
+    account = rng.choice(bank.get_accounts())
+    with contextlib.redirect_stdout(io.StringIO()):
+        account.list_transactions()
+    return 0
+
+ACTIONS = {"open": _open, "post": _post, "interest": _interest, "list": _list}
+
+def run_operation(Session, action, rng, date, lock_timeout):
+    """Run one teller operation in its own session, retrying while the database is locked.
+
+    Returns:
+        (transactions created, seconds spent waiting for the lock) (tuple)
+    Raises:
+        LockTimeout if the lock was not acquired within lock_timeout seconds
+    """
+    lock_wait, backoff = 0.0, 0.001
+    while True:
+        attempt_start = time.perf_counter()
+        session = Session()
+        try:
+            bank = session.query(Bank).first()
+            created = action(session, bank, rng, date)
+            session.commit()
+            return created, lock_wait
+        except OperationalError as e:
+            session.rollback()
+            if "database is locked" not in str(e):
+                raise
+            lock_wait += time.perf_counter() - attempt_start
+            if lock_wait >= lock_timeout:
+                raise LockTimeout(str(e.orig))
+            time.sleep(backoff)
+            lock_wait += backoff
+            backoff = min(backoff * 2, 0.1)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+def run_worker(worker_id, args):
+    """Drive a stream of randomly mixed operations against the database.
+
+    Returns:
+        worker statistics (dict)
+    """
+    engine = sqlalchemy.create_engine(f"sqlite:///{args.db}", connect_args={"timeout": 0})
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(args.seed * 1000 + worker_id)
+    names = [name for name in OPERATIONS if args.mix[name] > 0]
+    weights = [args.mix[name] for name in names]
+    stats = {"ops": dict.fromkeys(OPERATIONS, 0), "latencies": [], "lock_wait": 0.0,
+             "created": 0, "rejected": 0, "replayed": 0, "shared_keys": set(), "errors": {}}
+    start = time.perf_counter()
+    for i in range(args.ops):
+        if args.rate:
+            # pace the worker to the requested operations per second
+            time.sleep(max(0.0, start + i / args.rate - time.perf_counter()))
+        name = rng.choices(names, weights)[0]
+        # all workers move through the same simulated calendar at roughly the same pace
+        date = args.start_date + datetime.timedelta(days=i * args.days // args.ops)
+        action, posting = ACTIONS[name], None
+        if name == "post" and rng.random() < args.replay:
+            action = _replay
+            stats["replayed"] += 1
+        elif name == "post":
+            if rng.random() < args.shared:
+                # the same posting for step i in every worker, so workers race to post it
+                shared_rng = random.Random(f"{args.seed}-shared-{i}")
+                posting = {"key": f"{args.seed}-shared-{i}", "shared": True,
+                           "account_number": shared_rng.randint(1, args.accounts),
+                           "amount": decimal.Decimal(shared_rng.randint(1, 50000)) / 100}
+            else:
+                posting = {"key": f"{args.seed}-{worker_id}-{i}", "shared": False, "account_number": None,
+                           "amount": decimal.Decimal(rng.randint(-20000, 50000)) / 100}
+            action = functools.partial(_post, posting=posting)
+        op_start = time.perf_counter()
+        try:
+            created, lock_wait = run_operation(Session, action, rng, date, args.lock_timeout)
+            stats["created"] += created
+            stats["lock_wait"] += lock_wait
+            stats["ops"][name] += 1
+            if posting and posting["shared"]:
+                stats["shared_keys"].add(posting["key"])
+        except REJECTIONS:
+            stats["rejected"] += 1
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+            stats["errors"][error] = stats["errors"].get(error, 0) + 1
+        stats["latencies"].append(time.perf_counter() - op_start)
+    engine.dispose()
+    return stats
+
+def prepare_database(args):
+    """Create the schema, the bank and the initial accounts.
+
+    Returns:
+        number of transactions in the database before the run (int)
+    """
+    engine = sqlalchemy.create_engine(f"sqlite:///{args.db}")
+    create_schema(engine)
+    session = sessionmaker(bind=engine)()
+    bank = session.query(Bank).first()
+    if not bank:
+        bank = Bank()
+        session.add(bank)
+    for i in range(max(0, args.accounts - len(bank.get_accounts()))):
+        bank.open_account("checking" if i % 2 else "savings", session)
+    session.commit()
+    count = transaction_count(session)
+    session.close()
+    engine.dispose()
+    return count
+
+def transaction_count(session):
+    """Return the number of hot and archived transactions."""
+    return session.query(Transaction).count() + session.query(ArchivedTransaction).count()
+
+def check_consistency(args, initial_count, created):
+    """Check balances and transaction counts after the run.
+
+    Returns:
+        list of problems found (list of str)
+    """
+    engine = sqlalchemy.create_engine(f"sqlite:///{args.db}")
+    session = sessionmaker(bind=engine)()
+    problems = []
+    hot = dict(session.query(Transaction._account_id, func.sum(Transaction._amount)).group_by(Transaction._account_id).all())
+    archived = dict(session.query(ArchivedTransaction._account_id, func.sum(ArchivedTransaction._amount)).group_by(ArchivedTransaction._account_id).all())
+    numbers = {}
+    for account in session.query(Account).all():
+        numbers.setdefault(account.get_account_number(), []).append(account._id)
+        expected = (hot.get(account._id) or 0) + (archived.get(account._id) or 0)
+        if abs(account.get_balance() - decimal.Decimal(expected)) > decimal.Decimal("0.01"):
+            problems.append(f"account {account.get_account_number()}: balance {account.get_balance():,.2f} != transaction total {expected:,.2f}")
+    for number, ids in numbers.items():
+        if len(ids) > 1:
+            problems.append(f"account number {number} is shared by {len(ids)} accounts")
+    count = transaction_count(session)
+    if count != initial_count + created:
+        problems.append(f"{count} transactions in database, expected {initial_count + created}")
+    session.close()
+    engine.dispose()
+    return problems
+
+def report(stats, elapsed, problems):
+    """Print the combined statistics of all workers."""
+    latencies = [latency for s in stats for latency in s["latencies"]]
+    completed = sum(sum(s["ops"].values()) for s in stats)
+    rejected = sum(s["rejected"] for s in stats)
+    errors = {}
+    for s in stats:
+        for error, count in s["errors"].items():
+            errors[error] = errors.get(error, 0) + count
+    print(f"operations: {len(latencies)} in {elapsed:.2f}s, {completed} completed, {rejected} rejected, {sum(errors.values())} errors")
+    print(f"throughput: {completed / elapsed:.1f} ops/s")
+    print("by operation: " + ", ".join(f"{name} {sum(s['ops'][name] for s in stats)}" for name in OPERATIONS)
+          + f" ({sum(s['replayed'] for s in stats)} posts replayed, {len(set().union(*(s['shared_keys'] for s in stats)))} shared keys posted)")
+    print("latency: " + ", ".join(f"p{p} {percentile(latencies, p) * 1000:.1f}ms" for p in (50, 90, 99)) + f", max {max(latencies, default=0) * 1000:.1f}ms")
+    print(f"lock wait: {sum(s['lock_wait'] for s in stats):.2f}s total")
+    for error, count in sorted(errors.items(), key=lambda e: -e[1]):
+        print(f"error: {count} x {error}")
+    if problems:
+        [print(f"inconsistent: {problem}") for problem in problems]
+    else:
+        print("consistency: ok")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test concurrent tellers against one bank database.")
+    parser.add_argument("--db", default="stress.db", help="SQLite database file (default: stress.db)")
+    parser.add_argument("--workers", type=int, default=8, help="number of worker processes")
+    parser.add_argument("--ops", type=int, default=200, help="operations per worker")
+    parser.add_argument("--rate", type=float, default=0, help="operations per second per worker, 0 for unlimited")
+    parser.add_argument("--mix", type=parse_mix, default="open=1,post=6,interest=1,list=2", help="relative operation weights")
+    parser.add_argument("--replay", type=float, default=0.1, help="fraction of posts that retry a posting committed by any worker")
+    parser.add_argument("--shared", type=float, default=0.1, help="fraction of posts that every worker makes with the same key")
+    parser.add_argument("--accounts", type=int, default=10, help="accounts to open before the run")
+    parser.add_argument("--lock-timeout", type=float, default=5.0, help="seconds to wait for the database lock before failing")
+    parser.add_argument("--start-date", type=datetime.date.fromisoformat, default=datetime.date(2024, 1, 1), help="first posting date")
+    parser.add_argument("--days", type=int, default=365, help="days of postings to simulate")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    initial_count = prepare_database(args)
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        stats = pool.starmap(run_worker, [(worker_id, args) for worker_id in range(args.workers)])
+    elapsed = time.perf_counter() - start
+    created = sum(s["created"] for s in stats) + len(set().union(*(s["shared_keys"] for s in stats)))
+    problems = check_consistency(args, initial_count, created)
+    report(stats, elapsed, problems)
+
+if __name__ == "__main__":
+    main()
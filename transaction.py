@@ -1,18 +1,26 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, Date, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, Float, ForeignKey, Index
 Base = declarative_base()
 class Transaction(Base):
     """A class to record date and amount of deposits/withdrawals"""
 
     __tablename__ = 'transaction'
+    # idempotency keys are unique per account
+    __table_args__ = (Index("ix_transaction_account_idempotency_key", "_account_id", "_idempotency_key", unique=True),)
     _id = Column(Integer, primary_key=True)
     _account_id = Column(Integer, ForeignKey("account._id"))
     _amount = Column(Float(asdecimal=True))
     _date = Column(Date)
+    # "interest" or "fee" for transactions added by apply_interest_and_fees, otherwise None
+    _kind = Column(String)
+    # optional client-supplied key that makes retried postings take effect only once
+    _idempotency_key = Column(String)
 
-    def __init__(self, date, amount):
+    def __init__(self, date, amount, kind=None, idempotency_key=None):
         self._amount = amount
         self._date = date
+        self._kind = kind
+        self._idempotency_key = idempotency_key
     
     def get_date(self):
         """Return the date of the transaction."""
@@ -21,6 +29,10 @@ class Transaction(Base):
     def get_amount(self):
         """Return the amount of the transaction."""
         return self._amount
+
+    def get_kind(self):
+        """Return the kind of the transaction."""
+        return self._kind
     
     def __str__(self):
         return f"{self._date.strftime('%Y-%m-%d')}, ${self._amount:,.2f}"
\ No newline at end of file